@@ -371,10 +371,8 @@ class ConvRBM(Model):
 
         activations = F.conv2d(samples, self.W, bias=self.b)
 
-        # Creates a Softplus function for numerical stability
-        s = nn.Softplus()
-
-        h = torch.sum(s(activations), dim=(1, 2, 3))
+        # Softplus is used for numerical stability
+        h = torch.sum(F.softplus(activations), dim=(1, 2, 3))
         v = torch.sum(samples, dim=(1, 2, 3)) * torch.mean(self.a)
 
         energy = -v - h
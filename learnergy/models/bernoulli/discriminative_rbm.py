@@ -1,12 +1,14 @@
 """Discriminative Bernoulli-Bernoulli Restricted Boltzmann Machine.
 """
 
+import os
 import time
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
+import torch.optim as opt
 from torch.utils.data import DataLoader
 from tqdm import tqdm
 
@@ -17,6 +19,124 @@ from learnergy.utils import logging
 logger = logging.get_logger(__name__)
 
 
+def _compute_logits(
+    samples: torch.Tensor,
+    W: torch.Tensor,
+    b: torch.Tensor,
+    U: torch.Tensor,
+    c: torch.Tensor,
+) -> torch.Tensor:
+    """Computes the per-class logits, i.e., the unnormalized log of P(y|v).
+
+    Args:
+        samples: Samples to be labels-calculated.
+        W: Weights' matrix.
+        b: Hidden units bias.
+        U: Class weights' matrix.
+        c: Class units bias.
+
+    Returns:
+        Labels' logits based on input samples.
+
+    """
+
+    # W is stored as (n_visible, n_hidden), which is already the right
+    # orientation for a samples @ W product, so no transposed view is needed
+    activations = torch.addmm(b, samples, W)
+
+    # Calculates the logit-probabilities for every class at once,
+    # broadcasting over a (batch_size, n_classes, n_hidden) view
+    logits = c + torch.sum(
+        F.softplus(activations.unsqueeze(1) + U.unsqueeze(0)), dim=2
+    )
+
+    return logits
+
+
+if hasattr(torch, "compile"):
+    # TorchInductor fuses the broadcast-add, softplus and sum into a single
+    # (Triton, on GPU) kernel, so the (batch, n_classes, n_hidden)
+    # intermediate is never materialized in global memory
+    _compute_logits = torch.compile(
+        _compute_logits, mode="reduce-overhead", fullgraph=True
+    )
+
+
+def _flatten_collate(batch: List[Tuple[torch.Tensor, int]]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """Collates a batch of (sample, label) pairs, flattening each sample.
+
+    Flattening inside the collate function runs in the DataLoader
+    workers, off the training critical path.
+
+    Args:
+        batch: List of (sample, label) pairs incoming from the dataset.
+
+    Returns:
+        Flattened samples and their labels.
+
+    """
+
+    samples = torch.stack([sample.reshape(-1) for sample, _ in batch])
+
+    # Cross-entropy expects int64 labels, so the cast happens here
+    # in the worker rather than on-device per batch
+    labels = torch.tensor([label for _, label in batch], dtype=torch.long)
+
+    return samples, labels
+
+
+class _CUDAPrefetcher:
+    """Wraps a DataLoader and stages batches on a side CUDA stream.
+
+    While the current batch is being consumed on the default stream, the
+    following batch's host-to-device copy is already in flight on a
+    dedicated stream, overlapping transfer with compute.
+
+    """
+
+    def __init__(self, batches: DataLoader, device: str) -> None:
+        """Initialization method.
+
+        Args:
+            batches: DataLoader to be wrapped.
+            device: Device to which batches should be transferred.
+
+        """
+
+        self.batches = batches
+        self.device = device
+        self.stream = torch.cuda.Stream()
+
+    def __len__(self) -> int:
+        return len(self.batches)
+
+    def __iter__(self):
+        iterator = iter(self.batches)
+        batch = self._preload(iterator)
+
+        while batch is not None:
+            torch.cuda.current_stream().wait_stream(self.stream)
+
+            current = batch
+            for tensor in current:
+                tensor.record_stream(torch.cuda.current_stream())
+
+            # Issues the next copy before the current batch is consumed
+            batch = self._preload(iterator)
+
+            yield current
+
+    def _preload(self, iterator) -> Optional[Tuple[torch.Tensor, ...]]:
+        batch = next(iterator, None)
+        if batch is None:
+            return None
+
+        with torch.cuda.stream(self.stream):
+            return tuple(
+                tensor.to(self.device, non_blocking=True) for tensor in batch
+            )
+
+
 class DiscriminativeRBM(RBM):
     """A DiscriminativeRBM class provides the basic implementation for
     Discriminative Bernoulli-Bernoulli Restricted Boltzmann Machines.
@@ -74,10 +194,16 @@ class DiscriminativeRBM(RBM):
 
         self.loss = nn.CrossEntropyLoss()
 
-        self.optimizer.add_param_group({"params": self.U})
-        self.optimizer.add_param_group({"params": self.c})
+        # Rebuilds the optimizer so all parameters live in a single group,
+        # keeping the multi-tensor (foreach) SGD step to one kernel launch
+        self.optimizer = opt.SGD(
+            self.parameters(), lr=learning_rate, momentum=momentum, weight_decay=decay
+        )
 
         if self.device == "cuda":
+            # TF32 enables tensor-core matmuls for the activations' F.linear
+            torch.backends.cuda.matmul.allow_tf32 = True
+
             self.cuda()
 
         logger.info("Class overrided.")
@@ -126,29 +252,21 @@ class DiscriminativeRBM(RBM):
         self._loss = loss
 
     def labels_sampling(self, samples: torch.Tensor) -> torch.Tensor:
-        """Calculates labels probabilities by samplings, i.e., P(y|v).
+        """Calculates labels logits by samplings, i.e., the unnormalized log of P(y|v).
 
         Args:
             samples: Samples to be labels-calculated.
 
         Returns:
-            Labels' probabilities based on input samples.
+            Labels' logits and predictions based on input samples.
 
         """
 
-        probs = torch.zeros(samples.size(0), self.n_classes, device=self.device)
-        activations = F.linear(samples, self.W.t(), self.b)
+        logits = _compute_logits(samples, self.W, self.b, self.U, self.c)
 
-        # Creates a Softplus function for numerical stability
-        s = nn.Softplus()
+        preds = torch.argmax(logits, dim=1)
 
-        for i in range(self.n_classes):
-            # Calculates the logit-probability for the particular class
-            probs[:, i] = self.c[i] + torch.sum(s(activations + self.U[i, :]), dim=1)
-
-        preds = torch.argmax(probs.detach(), 1)
-
-        return probs, preds
+        return logits, preds
 
     def fit(
         self,
@@ -169,25 +287,42 @@ class DiscriminativeRBM(RBM):
         """
 
         batches = DataLoader(
-            dataset, batch_size=batch_size, shuffle=True, num_workers=0
+            dataset,
+            batch_size=batch_size,
+            shuffle=True,
+            num_workers=min(8, os.cpu_count() or 1),
+            persistent_workers=True,
+            prefetch_factor=4,
+            pin_memory=(self.device == "cuda"),
+            collate_fn=_flatten_collate,
         )
+        num_batches = len(batches)
+
+        if self.device == "cuda":
+            # Overlaps the next batch's host-to-device copy with training
+            batches = _CUDAPrefetcher(batches, self.device)
 
         for epoch in range(epochs):
             logger.info("Epoch %d/%d", epoch + 1, epochs)
 
             start = time.time()
 
-            loss = 0
-            acc = 0
+            loss = 0.0
+            acc = 0.0
 
             for samples, labels in tqdm(batches):
-                samples = samples.reshape(len(samples), self.n_visible)
-                if self.device == "cuda":
-                    samples = samples.cuda()
-                    labels = labels.cuda()
-
-                probs, _ = self.labels_sampling(samples)
-                cost = self.loss(probs, labels)
+                samples = samples.to(self.device, non_blocking=True)
+                labels = labels.to(self.device, non_blocking=True)
+
+                # Mixed precision halves the bytes moved by the memory-bound
+                # forward on CUDA; parameters stay in full precision
+                with torch.autocast(
+                    device_type=self.device,
+                    dtype=torch.bfloat16,
+                    enabled=(self.device == "cuda"),
+                ):
+                    logits, _ = self.labels_sampling(samples)
+                    cost = F.cross_entropy(logits, labels)
 
                 self.optimizer.zero_grad()
                 cost.backward()
@@ -195,32 +330,31 @@ class DiscriminativeRBM(RBM):
 
                 _, preds = self.labels_sampling(samples)
 
-                batch_size = samples.size(0)
-                batch_acc = torch.mean(
-                    (torch.sum(preds == labels).float()) / batch_size
-                )
+                batch_acc = (preds == labels).float().mean().item()
 
-                loss += cost.detach()
+                loss += cost.item()
                 acc += batch_acc
 
-            loss /= len(batches)
-            acc /= len(batches)
+            loss /= num_batches
+            acc /= num_batches
 
             end = time.time()
 
-            self.dump(loss=loss.item(), acc=acc.item(), time=end - start)
+            self.dump(loss=loss, acc=acc, time=end - start)
 
             logger.info("Loss: %f | Accuracy: %f", loss, acc)
 
         return loss, acc
 
+    @torch.inference_mode()
     def predict(
-        self, dataset: torch.utils.data.Dataset
+        self, dataset: torch.utils.data.Dataset, batch_size: int = 256
     ) -> Tuple[float, torch.Tensor, torch.Tensor]:
         """Predicts batches of new samples.
 
         Args:
             dataset: A Dataset object containing the testing data.
+            batch_size: Amount of samples per batch.
 
         Returns:
             Accuracy, prediction probabilities and labels, i.e., P(y|v).
@@ -229,25 +363,41 @@ class DiscriminativeRBM(RBM):
 
         logger.info("Predicting new samples ...")
 
-        acc = 0
-        batch_size = len(dataset)
-
         batches = DataLoader(
-            dataset, batch_size=batch_size, shuffle=False, num_workers=0
+            dataset,
+            batch_size=batch_size,
+            shuffle=False,
+            num_workers=min(8, os.cpu_count() or 1),
+            persistent_workers=True,
+            prefetch_factor=4,
+            pin_memory=(self.device == "cuda"),
+            collate_fn=_flatten_collate,
         )
 
+        correct, total = 0, 0
+        probs, preds = [], []
+
         for samples, labels in tqdm(batches):
-            samples = samples.reshape(len(samples), self.n_visible)
-            if self.device == "cuda":
-                samples = samples.cuda()
-                labels = labels.cuda()
+            samples = samples.to(self.device, non_blocking=True)
+            labels = labels.to(self.device, non_blocking=True)
+
+            batch_logits, batch_preds = self.labels_sampling(samples)
+
+            # Normalizes through log-sum-exp for numerical stability
+            batch_probs = torch.exp(
+                batch_logits - torch.logsumexp(batch_logits, dim=1, keepdim=True)
+            )
 
-            probs, preds = self.labels_sampling(samples)
+            correct += (batch_preds == labels).sum().item()
+            total += labels.size(0)
 
-            batch_acc = torch.mean((torch.sum(preds == labels).float()) / batch_size)
-            acc += batch_acc
+            probs.append(batch_probs)
+            preds.append(batch_preds)
 
-        acc /= len(batches)
+        probs = torch.cat(probs)
+        preds = torch.cat(preds)
+
+        acc = correct / total
 
         logger.info("Accuracy: %f", acc)
 
@@ -425,27 +575,37 @@ class HybridDiscriminativeRBM(DiscriminativeRBM):
         """
 
         batches = DataLoader(
-            dataset, batch_size=batch_size, shuffle=True, num_workers=0
+            dataset,
+            batch_size=batch_size,
+            shuffle=True,
+            num_workers=min(8, os.cpu_count() or 1),
+            persistent_workers=True,
+            prefetch_factor=4,
+            pin_memory=(self.device == "cuda"),
+            collate_fn=_flatten_collate,
         )
+        num_batches = len(batches)
+
+        if self.device == "cuda":
+            # Overlaps the next batch's host-to-device copy with training
+            batches = _CUDAPrefetcher(batches, self.device)
 
         for epoch in range(epochs):
             logger.info("Epoch %d/%d", epoch + 1, epochs)
 
             start = time.time()
 
-            d_loss, g_loss, loss, acc = 0, 0, 0, 0
+            d_loss, g_loss, loss, acc = 0.0, 0.0, 0.0, 0.0
 
             for samples, labels in tqdm(batches):
-                samples = samples.reshape(len(samples), self.n_visible)
-                if self.device == "cuda":
-                    samples = samples.cuda()
-                    labels = labels.cuda()
+                samples = samples.to(self.device, non_blocking=True)
+                labels = labels.to(self.device, non_blocking=True)
 
                 _, _, _, _, visible_states = self.gibbs_sampling(samples, labels)
                 visible_states = visible_states.detach()
-                disc_probs, _ = self.labels_sampling(samples)
+                disc_logits, _ = self.labels_sampling(samples)
 
-                d_cost = self.loss(disc_probs, labels)
+                d_cost = F.cross_entropy(disc_logits, labels)
                 g_cost = -self.pseudo_likelihood(samples)
                 cost = d_cost + self.alpha * g_cost
 
@@ -455,28 +615,25 @@ class HybridDiscriminativeRBM(DiscriminativeRBM):
 
                 _, preds = self.labels_sampling(samples)
 
-                batch_size = samples.size(0)
-                batch_acc = torch.mean(
-                    (torch.sum(preds == labels).float()) / batch_size
-                )
+                batch_acc = (preds == labels).float().mean().item()
 
-                d_loss += d_cost
-                g_loss += g_cost
-                loss += cost.detach()
+                d_loss += d_cost.item()
+                g_loss += g_cost.item()
+                loss += cost.item()
                 acc += batch_acc
 
-            d_loss /= len(batches)
-            g_loss /= len(batches)
-            loss /= len(batches)
-            acc /= len(batches)
+            d_loss /= num_batches
+            g_loss /= num_batches
+            loss /= num_batches
+            acc /= num_batches
 
             end = time.time()
 
             self.dump(
-                d_loss=d_loss.item(),
-                g_loss=g_loss.item(),
-                loss=loss.item(),
-                acc=acc.item(),
+                d_loss=d_loss,
+                g_loss=g_loss,
+                loss=loss,
+                acc=acc,
                 time=end - start,
             )
 
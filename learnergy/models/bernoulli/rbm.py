@@ -338,10 +338,8 @@ class RBM(Model):
 
         activations = F.linear(samples, self.W.t(), self.b)
 
-        # Creates a Softplus function for numerical stability
-        s = nn.Softplus()
-
-        h = torch.sum(s(activations), dim=1)
+        # Softplus is used for numerical stability
+        h = torch.sum(F.softplus(activations), dim=1)
         v = torch.mv(samples, self.a)
 
         energy = -v - h
@@ -115,10 +115,8 @@ class GaussianRBM(RBM):
 
         activations = F.linear(samples, self.W.t(), self.b)
 
-        # Creates a Softplus function for numerical stability
-        s = nn.Softplus()
-
-        h = torch.sum(s(activations), dim=1)
+        # Softplus is used for numerical stability
+        h = torch.sum(F.softplus(activations), dim=1)
         v = 0.5 * torch.sum((samples - self.a) ** 2, dim=1)
 
         energy = v - h
@@ -608,10 +606,8 @@ class VarianceGaussianRBM(RBM):
         sigma = torch.pow(self.sigma, 2)
         activations = F.linear(torch.div(samples, sigma), self.W.t(), self.b)
 
-        # Createa a Softplus function for numerical stability
-        s = nn.Softplus()
-
-        h = torch.sum(s(activations), dim=1)
+        # Softplus is used for numerical stability
+        h = torch.sum(F.softplus(activations), dim=1)
         v = torch.sum(torch.div(torch.pow(samples - self.a, 2), 2 * sigma), dim=1)
 
         energy = -v - h